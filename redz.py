@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""
+Thin launcher for RedzNoLag one-shot commands (hotkeys, scripts):
+    python redz.py <perintah> [argumen ...]
+The command list is RedzNoLag.CLI_USAGE (printed for an unknown command).
+Importing the module, instead of running it as a script, lets Python reuse
+its cached bytecode, so cold start skips recompiling the whole file.
+"""
+import sys
+
+from RedzNoLag import main
+
+if __name__ == "__main__":
+    sys.exit(main())